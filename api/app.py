@@ -1,7 +1,85 @@
 from fastapi import FastAPI
-from views import app
-from fastapi.responses import RedirectResponse
+from views import app, controller
+from fastapi.responses import ORJSONResponse, RedirectResponse, Response
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from prometheus_client import multiprocess
+from prometheus_fastapi_instrumentator import Instrumentator
+from contextlib import asynccontextmanager
+import asyncio
+import functools
+import os
 
 
-api = FastAPI(title="Kubernetes Management API", version="1.0")
+# Scope key carrying the un-gzipped send through GZipMiddleware to the app it wraps
+_UNCOMPRESSED_SEND = "gzip.uncompressed_send"
+
+
+async def _send_event_streams_uncompressed(app, scope, receive, send):
+    """
+    Run the app, sending text/event-stream responses straight to the client.
+    """
+    uncompressed_send = scope.get(_UNCOMPRESSED_SEND)
+    if uncompressed_send is None:
+        await app(scope, receive, send)
+        return
+
+    target = send
+
+    async def route(message):
+        nonlocal target
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith("text/event-stream"):
+                target = uncompressed_send
+        await target(message)
+
+    await app(scope, receive, route)
+
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZip responses, except server-sent event streams, which gzip would buffer.
+
+    The response's content type decides, so no route paths are involved.
+    """
+
+    def __init__(self, app, **kwargs):
+        super().__init__(functools.partial(
+            _send_event_streams_uncompressed, app), **kwargs)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope = {**scope, _UNCOMPRESSED_SEND: send}
+        await super().__call__(scope, receive, send)
+
+
+@asynccontextmanager
+async def lifespan(api):
+    # Clients and their connection pools live for the whole process
+    await asyncio.to_thread(controller.start)
+    yield
+    await asyncio.to_thread(controller.close)
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Drop this worker's live gauge files from the shared metrics directory
+        multiprocess.mark_process_dead(os.getpid())
+
+
+api = FastAPI(title="Kubernetes Management API", version="1.0",
+              default_response_class=ORJSONResponse, lifespan=lifespan)
+api.add_middleware(StreamAwareGZipMiddleware, minimum_size=1024)
 api.include_router(app)
+# Per-route request and latency metrics, served with the process's own metrics at /metrics;
+# with PROMETHEUS_MULTIPROC_DIR set, they are aggregated across all workers
+Instrumentator().instrument(api).expose(api, include_in_schema=False)
+
+
+@api.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request, exc):
+    # Error payloads go through orjson too, like every other response
+    headers = getattr(exc, "headers", None)
+    if not is_body_allowed_for_status_code(exc.status_code):
+        return Response(status_code=exc.status_code, headers=headers)
+    return ORJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=headers)
@@ -1,24 +1,50 @@
-from model import KubernetesCluster
+from model import KubernetesCluster, ScaleMetric
+import asyncio
+
+
+# Cap on concurrent lookups when /status fans out over several deployments.
+_STATUS_FANOUT = asyncio.Semaphore(32)
 
 
 class KubernetesController:
     def __init__(self):
         self.cluster = KubernetesCluster()
 
-    def connect_cluster(self, context=None):
-        self.cluster.connect(context)
+    def start(self):
+        self.cluster.start()
+
+    def close(self):
+        self.cluster.close()
+
+    async def connect_cluster(self, context=None):
+        await asyncio.to_thread(self.cluster.connect, context)
+
+    async def list_contexts(self):
+        return await asyncio.to_thread(self.cluster.get_contexts)
+
+    async def install_dependencies(self, metric_server, keda, remoteValues, values):
+        return await self.cluster.install_dependencies(metric_server, keda, remoteValues, values)
+
+    async def verify_installation(self):
+        return await self.cluster.verify_installation()
 
-    def list_contexts(self):
-        return self.cluster.get_contexts()
+    async def deploy_application(self, namespace, image_name, version, port, scale_metric=ScaleMetric.BOTH):
+        return await self.cluster.deploy_image(namespace, image_name, version, port, scale_metric)
 
-    def install_dependencies(self, metric_server, keda, remoteValues, values):
-        return self.cluster.install_dependencies(metric_server, keda, remoteValues, values)
+    def watch_rollout(self, namespace, deployment, is_disconnected=None):
+        return self.cluster.watch_rollout(namespace, deployment, is_disconnected)
 
-    def verify_installation(self):
-        return self.cluster.verify_installation()
+    async def get_deployment_status(self, namespace, deployment, limit=100, cont=None, label_selector=None, field_selector=None, output="json"):
+        return await asyncio.to_thread(
+            self.cluster.get_status, namespace, deployment, limit, cont, label_selector, field_selector, output)
 
-    def deploy_application(self, namespace, image_name, version, port):
-        return self.cluster.deploy_image(namespace, image_name, version, port)
+    async def get_deployment_statuses(self, namespace, deployments):
+        async def one(deployment):
+            async with _STATUS_FANOUT:
+                return await asyncio.to_thread(self.cluster.get_status, namespace, deployment)
 
-    def get_deployment_status(self, namespace, deployment):
-        return self.cluster.get_status(namespace, deployment)
+        items = await asyncio.gather(*(one(deployment) for deployment in deployments))
+        return {
+            "items": items,
+            "resource_version": ".".join(item["resource_version"] or "" for item in items),
+        }
@@ -0,0 +1,109 @@
+from kubernetes import watch
+from metrics import APISERVER_CALLS
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds a single watch request stays open before it is resumed from the last seen version.
+WATCH_TIMEOUT = 300
+# Bounds, in seconds, of the backoff between failed list/watch attempts.
+RETRY_DELAY = 1
+MAX_RETRY_DELAY = 60
+
+
+class DeploymentInformer:
+    """
+    Keep an in-memory record of every Deployment's replica status, updated from a
+    list-then-watch loop running on a background thread.
+
+    Only the fields status reads need are kept, not the full objects.
+    """
+
+    def __init__(self, apps_v1):
+        self.apps_v1 = apps_v1
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._watch = None
+        self._thread = threading.Thread(
+            target=self._run, name="deployment-informer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def get(self, namespace, name):
+        """
+        Return the cached status record, or None if it is unknown or the cache has not synced yet.
+        """
+        if not self._synced.is_set():
+            return None
+        with self._lock:
+            return self._cache.get((namespace, name))
+
+    def _run(self):
+        delay = RETRY_DELAY
+        while not self._stopped.is_set():
+            try:
+                self._list_and_watch()
+                delay = RETRY_DELAY
+            except Exception as e:
+                self._synced.clear()
+                logger.warning(
+                    "Deployment watch failed, relisting in %ss: %s", delay, e)
+                self._stopped.wait(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    def _list_and_watch(self):
+        APISERVER_CALLS.labels("list", "deployments").inc()
+        deployments = self.apps_v1.list_deployment_for_all_namespaces()
+        with self._lock:
+            self._cache = {
+                (deploy.metadata.namespace, deploy.metadata.name): _record(deploy)
+                for deploy in deployments.items
+            }
+        self._synced.set()
+
+        # Resume from the last seen version after each watch timeout; only errors
+        # (e.g. 410 Gone, raised by the watch) fall back to a full relist
+        resource_version = deployments.metadata.resource_version
+        while not self._stopped.is_set():
+            resource_version = self._watch_from(resource_version)
+
+    def _watch_from(self, resource_version):
+        self._watch = watch.Watch()
+        # stop() may have run before this watch existed
+        if self._stopped.is_set():
+            return resource_version
+        APISERVER_CALLS.labels("watch", "deployments").inc()
+        for event in self._watch.stream(
+                self.apps_v1.list_deployment_for_all_namespaces,
+                resource_version=resource_version,
+                allow_watch_bookmarks=True,
+                timeout_seconds=WATCH_TIMEOUT):
+            deploy = event["object"]
+            resource_version = deploy.metadata.resource_version
+            if event["type"] == "BOOKMARK":
+                continue
+            key = (deploy.metadata.namespace, deploy.metadata.name)
+            with self._lock:
+                if event["type"] == "DELETED":
+                    self._cache.pop(key, None)
+                else:
+                    self._cache[key] = _record(deploy)
+        return resource_version
+
+
+def _record(deploy):
+    return {
+        "ready_replicas": deploy.status.ready_replicas,
+        "available_replicas": deploy.status.available_replicas,
+        "resource_version": deploy.metadata.resource_version,
+    }
@@ -0,0 +1,8 @@
+from prometheus_client import Counter
+
+
+APISERVER_CALLS = Counter(
+    "k8s_apiserver_calls_total",
+    "Requests made to the Kubernetes API server.",
+    ["verb", "resource"],
+)
@@ -1,80 +1,380 @@
-from kubernetes import client, config
+from kubernetes import client, config, watch
 from kubernetes.client.rest import ApiException
 from kubernetes.utils import create_from_yaml
 from fastapi import HTTPException
-import tempfile
+from informer import DeploymentInformer
+from metrics import APISERVER_CALLS
+from enum import Enum
+import asyncio
+import contextlib
+import functools
+import io
+import logging
+import orjson
+import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import yaml
 import re
 import subprocess
+import tempfile
+import threading
+import time
 from shutil import which
 
 
+METRICS_SERVER_URL = "https://github.com/kubernetes-sigs/metrics-server/releases/latest/download/components.yaml"
+KEDA_CHART_URL = "https://kedacore.github.io/charts"
+
+# libyaml-backed safe loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+_GITHUB_BLOB_RE = re.compile(r"^https://github\.com(/.*?)/blob(/.*)$")
+
+# Keep-alive connections held open to the apiserver, shared by all requests.
+APISERVER_POOL_SIZE = 32
+
+# Seconds before a known Helm repo index is considered stale.
+HELM_REPO_TTL = 600
+
+# Seconds a fetched remote values file is reused before being fetched again.
+REMOTE_VALUES_TTL = 300
+
+# Seconds a verify_installation result is reused.
+VERIFY_CACHE_TTL = 5.0
+
+# Characters of helm install output returned to the client.
+HELM_OUTPUT_LIMIT = 512
+
+# Seconds /deploy streams rollout progress before giving up.
+ROLLOUT_TIMEOUT = 300
+
+# Seconds each rollout watch request stays open, bounding how long a worker
+# thread is held after the client goes away.
+ROLLOUT_WATCH_SLICE = 5
+
+# (connect, read) timeouts for remote manifest and values fetches.
+HTTP_TIMEOUT = (3.05, 30)
+
+# Bound the number of concurrent Helm subprocesses to keep memory in check.
+_SUBPROCESS_SEM = asyncio.Semaphore(
+    int(os.environ.get("HELM_MAX_PARALLEL", "4")))
+
+
+logger = logging.getLogger(__name__)
+
+
+def _error_detail(e):
+    """
+    Extract a readable message from an exception, preferring the payload it carries.
+    """
+    if isinstance(e, HTTPException):
+        return e.detail
+    if isinstance(e, ApiException) and e.body:
+        return e.body
+    if isinstance(e, subprocess.CalledProcessError) and e.stderr:
+        return e.stderr.strip()
+    return str(e)
+
+
+async def _run_subprocess(cmd, **kwargs):
+    """
+    Run a command in a worker thread, bounded by the subprocess semaphore.
+    """
+    async with _SUBPROCESS_SEM:
+        return await asyncio.to_thread(subprocess.run, cmd, check=True, **kwargs)
+
+
+def _server_error(message, e):
+    """
+    Log a failure and wrap it in a 500 HTTPException.
+    """
+    detail = _error_detail(e)
+    logger.error("%s: %s", message, detail)
+    return HTTPException(status_code=500, detail=f"{message}: {detail}")
+
+
+# Manifest templates; the None leaves are filled in per request.
+_DEPLOYMENT_TMPL = {
+    "apiVersion": "apps/v1",
+    "kind": "Deployment",
+    "metadata": {"name": None, "namespace": None},
+    "spec": {
+        "replicas": 1,
+        "selector": {"matchLabels": {"app": None}},
+        "template": {
+            "metadata": {"labels": {"app": None}},
+            "spec": {
+                "containers": [
+                    {
+                        "name": None,
+                        "image": None,
+                        "ports": [{"containerPort": None}],
+                        "resources": {
+                            "requests": {"cpu": "100m", "memory": "128Mi"},
+                            "limits": {"cpu": "500m", "memory": "512Mi"},
+                        },
+                    }
+                ]
+            },
+        },
+    },
+}
+
+_SERVICE_TMPL = {
+    "apiVersion": "v1",
+    "kind": "Service",
+    "metadata": {"name": None, "namespace": None},
+    "spec": {
+        "selector": {"app": None},
+        "ports": [{"protocol": "TCP", "port": None, "targetPort": None}],
+        "type": "NodePort",
+    },
+}
+
+_SCALEDOBJECT_TMPL = {
+    "apiVersion": "keda.sh/v1alpha1",
+    "kind": "ScaledObject",
+    "metadata": {"name": None, "namespace": None},
+    "spec": {
+        "minReplicaCount": 1,
+        "scaleTargetRef": {
+            "name": None,
+            "kind": "Deployment",
+        },
+        "triggers": None
+    }
+}
+
+_TRIGGERS = {
+    "cpu": {
+        "type": "cpu",
+        "metricType": "Utilization",
+        "metadata": {
+            "value": "80"  # Scale when CPU exceeds 80%
+        }
+    },
+    "memory": {
+        "type": "memory",
+        "metricType": "Utilization",
+        "metadata": {
+            "value": "80"  # Scale when memory exceeds 80%
+        }
+    },
+}
+
+
+class ScaleMetric(str, Enum):
+    """
+    Resource metrics a ScaledObject can scale on.
+    """
+    CPU = "cpu"
+    MEMORY = "memory"
+    BOTH = "cpu,memory"
+
+
+# Serialized once; orjson.loads yields a fresh copy faster than copy.deepcopy.
+_DEPLOYMENT_JSON = orjson.dumps(_DEPLOYMENT_TMPL)
+_SERVICE_JSON = orjson.dumps(_SERVICE_TMPL)
+_SCALEDOBJECT_JSON = orjson.dumps(_SCALEDOBJECT_TMPL)
+_SCALE_TRIGGERS_JSON = {
+    metric: orjson.dumps([_TRIGGERS[name] for name in metric.value.split(",")])
+    for metric in ScaleMetric
+}
+
+
+def _deployment_manifest(namespace, name, image, port):
+    manifest = orjson.loads(_DEPLOYMENT_JSON)
+    manifest["metadata"]["name"] = name
+    manifest["metadata"]["namespace"] = namespace
+    spec = manifest["spec"]
+    spec["selector"]["matchLabels"]["app"] = name
+    spec["template"]["metadata"]["labels"]["app"] = name
+    container = spec["template"]["spec"]["containers"][0]
+    container["name"] = name
+    container["image"] = image
+    container["ports"][0]["containerPort"] = port
+    return manifest
+
+
+def _service_manifest(namespace, name, port):
+    manifest = orjson.loads(_SERVICE_JSON)
+    manifest["metadata"]["name"] = name
+    manifest["metadata"]["namespace"] = namespace
+    manifest["spec"]["selector"]["app"] = name
+    manifest["spec"]["ports"][0]["port"] = port
+    manifest["spec"]["ports"][0]["targetPort"] = port
+    return manifest
+
+
+def _scaled_object_manifest(namespace, deployment_name, scale_metric=ScaleMetric.BOTH):
+    manifest = orjson.loads(_SCALEDOBJECT_JSON)
+    manifest["metadata"]["name"] = f"{deployment_name}-scaledobject"
+    manifest["metadata"]["namespace"] = namespace
+    manifest["spec"]["scaleTargetRef"]["name"] = deployment_name
+    manifest["spec"]["triggers"] = orjson.loads(
+        _SCALE_TRIGGERS_JSON[scale_metric])
+    return manifest
+
+
+@functools.lru_cache(maxsize=1)
+def _load_contexts(mtime, path):
+    """
+    Parse context names from the kubeconfig; cached until its mtime changes.
+    """
+    contexts, _ = config.list_kube_config_contexts(config_file=path)
+    return tuple(ctx["name"] for ctx in contexts)
+
+
 class KubernetesCluster:
     def __init__(self):
         self.api_client = None
         self.apps_v1 = None
         self.core_v1 = None
         self.autoscaling_v1 = None
+        self.custom_api = None
+        self.informer = None
         self.helm_executable = which("helm")
+        # Helm repos added by this process: name -> (url, last update time)
+        self._helm_repos = {}
+        self._helm_repo_locks = {}
+        # (time computed, result) of the last verify_installation call
+        self._verify_cache = (0.0, None)
+        self._verify_lock = asyncio.Lock()
+        self.http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[502, 503, 504]))
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+
+        # Guards (re)loading kubeconfig and swapping the API clients
+        self._lock = threading.Lock()
+        self._current_context = None
+
+    def start(self):
+        """
+        Load the default kubeconfig and build the long-lived API clients.
+        """
+        with self._lock:
+            try:
+                config.load_kube_config()
+                self._init_clients()
+            except Exception as e:
+                logger.warning("Default kubeconfig not loaded: %s", e)
+
+    def close(self):
+        """
+        Stop the informer and release pooled connections.
+        """
+        with self._lock:
+            if self.informer is not None:
+                self.informer.stop()
+                self.informer = None
+            if self.api_client is not None:
+                self.api_client.close()
+        self.http.close()
+
+    def _init_clients(self):
+        """
+        Build the API clients from the currently loaded configuration.
+
+        All APIs share one ApiClient, and with it one connection pool.
+        """
+        cfg = client.Configuration.get_default_copy()
+        cfg.retries = 3
+        cfg.connection_pool_maxsize = APISERVER_POOL_SIZE
+        self.api_client = client.ApiClient(configuration=cfg)
+        # urllib3 transparently decompresses gzip responses from the apiserver
+        self.api_client.set_default_header("Accept-Encoding", "gzip")
+        self.apps_v1 = client.AppsV1Api(self.api_client)
+        self.core_v1 = client.CoreV1Api(self.api_client)
+        self.autoscaling_v1 = client.AutoscalingV1Api(self.api_client)
+        self.custom_api = client.CustomObjectsApi(self.api_client)
+
+        # Serve deployment reads from a watch-backed cache of the new cluster
+        if self.informer is not None:
+            self.informer.stop()
+        self.informer = DeploymentInformer(self.apps_v1)
+        self.informer.start()
 
     def connect(self, context=None):
         """
         Load the Kubernetes configuration for the given context.
+
+        A no-op when already connected to that context.
         """
-        try:
-            if context:
+        with self._lock:
+            if self.api_client is not None and context == self._current_context:
+                return
+            try:
                 config.load_kube_config(context=context)
-            self.api_client = client.ApiClient()
-            self.apps_v1 = client.AppsV1Api(self.api_client)
-            self.core_v1 = client.CoreV1Api(self.api_client)
-            self.autoscaling_v1 = client.AutoscalingV1Api(self.api_client)
-            self.custom_api = client.CustomObjectsApi()
-        except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"Failed to connect to the cluster: {str(e)}")
+                self._init_clients()
+                self._current_context = context
+                self._verify_cache = (0.0, None)
+            except Exception as e:
+                raise _server_error("Failed to connect to the cluster", e)
 
     def get_contexts(self):
         """
         List all available Kubernetes contexts from the kubeconfig.
         """
         try:
-            contexts, _ = config.list_kube_config_contexts()
-            return [ctx["name"] for ctx in contexts]
+            path = os.path.expanduser(
+                os.environ.get("KUBECONFIG", "~/.kube/config"))
+            mtime = tuple(os.path.getmtime(os.path.expanduser(p))
+                          for p in path.split(os.pathsep) if p)
+            return list(_load_contexts(mtime, path))
         except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"Error fetching contexts: {str(e)}")
+            raise _server_error("Error fetching contexts", e)
 
-    def install_dependencies(self, metric_server, keda, remoteValues, values):
+    async def install_dependencies(self, metric_server, keda, remoteValues, values):
         """
-        Install dependencies like Metrics Server, and KEDA.
+        Install dependencies like Metrics Server, and KEDA concurrently.
         """
+        installers = [
+            (metric_server, "Metrics Server", self._install_metrics_server),
+            (keda, "KEDA", functools.partial(
+                self._install_keda, values, remoteValues)),
+        ]
+        tasks = {name: install()
+                 for requested, name, install in installers if requested}
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        # Installs change what /verify reports
+        self._verify_cache = (0.0, None)
+
         results = []
+        failures = []
+        for name, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, Exception):
+                failures.append(
+                    f"Failed to install {name}: {_error_detail(outcome)}")
+            else:
+                results.append(f"{name} installed successfully.")
+
+        if failures:
+            raise HTTPException(
+                status_code=500, detail={"installed": results, "failed": failures})
 
-        if metric_server:
-            try:
-                self.apply_yaml_from_url(
-                    "https://github.com/kubernetes-sigs/metrics-server/releases/latest/download/components.yaml")
-                results.append("Metrics Server installed successfully.")
-            except ApiException as e:
-                raise HTTPException(
-                    status_code=500, detail=f"Failed to install Metrics Server: {e.body}")
+        return {"installed": results}
 
-        if keda:
-            try:
-                self.install_chart(
-                    release_name="keda",
-                    chart_name="keda",
-                    namespace="keda",
-                    chart_url="https://kedacore.github.io/charts",
-                    values=values,
-                    remoteValues=remoteValues
-                )
-                results.append("KEDA installed successfully.")
-            except ApiException as e:
-                raise HTTPException(
-                    status_code=500, detail=f"Failed to install KEDA: {e.body}")
+    async def _install_metrics_server(self):
+        await asyncio.to_thread(self.apply_yaml_from_url, METRICS_SERVER_URL)
 
-        return {"installed": results}
+    async def _install_keda(self, values, remoteValues):
+        # The chart refreshes its own repo, so repo updates overlap with other installs
+        return await self.install_chart(
+            release_name="keda",
+            chart_name="keda",
+            namespace="keda",
+            chart_url=KEDA_CHART_URL,
+            values=values,
+            remoteValues=remoteValues
+        )
 
     def apply_yaml_from_url(self, url: str):
         """
@@ -82,27 +382,21 @@ class KubernetesCluster:
         """
         try:
             # Fetch YAML content from the URL
-            response = requests.get(url)
+            response = self.http.get(url, timeout=HTTP_TIMEOUT)
             response.raise_for_status()
         except requests.RequestException as e:
-            raise HTTPException(
-                status_code=500, detail=f"Failed to fetch YAML from URL: {e}")
-
-        # Save YAML content to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".yaml") as temp_file:
-            temp_file.write(response.content)
-            temp_file_path = temp_file.name
+            raise _server_error("Failed to fetch YAML from URL", e)
 
         try:
+            # Parse the manifest in memory, skipping empty documents
+            manifests = [doc for doc in yaml.load_all(
+                response.text, Loader=_YAML_LOADER) if doc]
             # Apply the YAML using Kubernetes Python client
-            create_from_yaml(self.api_client, temp_file_path)
+            # Manifests hold arbitrary kinds, so they share one resource label
+            APISERVER_CALLS.labels("create", "manifests").inc(len(manifests))
+            create_from_yaml(self.api_client, yaml_objects=manifests)
         except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"Failed to apply Kubernetes manifest: {e}")
-        finally:
-            # Clean up the temporary file
-            args = ('rm', temp_file_path)
-            subprocess.call('%s %s' % args, shell=True)
+            raise _server_error("Failed to apply Kubernetes manifest", e)
 
     def get_github_raw_content(self, url: str):
         """
@@ -110,16 +404,22 @@ class KubernetesCluster:
 
         :param url: GitHub URL (raw or page URL)
         :return: Content of the file (str)
+
+        Successful fetches are cached per URL for up to REMOTE_VALUES_TTL seconds.
         """
-        raw_url = url
+        return self._fetch_github_raw_content(
+            url, int(time.monotonic() // REMOTE_VALUES_TTL))
+
+    @functools.lru_cache(maxsize=64)
+    def _fetch_github_raw_content(self, url: str, ttl_bucket: int):
+        # ttl_bucket only keys the cache, so entries expire when the bucket rolls over
         # Convert the GitHub URL to raw format if it's not already raw
-        if url.startswith("https://github.com"):
-            raw_url = url.replace(
-                "github.com", "raw.githubusercontent.com").replace("/blob", "")
+        raw_url = _GITHUB_BLOB_RE.sub(
+            r"https://raw.githubusercontent.com\1\2", url)
 
         try:
             # Send a GET request to the raw GitHub file URL
-            response = requests.get(raw_url)
+            response = self.http.get(raw_url, timeout=HTTP_TIMEOUT)
 
             # Check if the request was successful
             response.raise_for_status()
@@ -127,187 +427,227 @@ class KubernetesCluster:
             # Return the content of the file
             return response.text
         except requests.exceptions.RequestException as e:
-            print(f"Error fetching file: {e}")
-            return None
+            raise _server_error("Error fetching file", e)
 
-    def install_chart(self, release_name: str, chart_name: str, chart_url: str, namespace: str = "default", values: dict = None, remoteValues: str = None):
+    async def install_chart(self, release_name: str, chart_name: str, chart_url: str, namespace: str = "default", values: str = None, remoteValues: str = None):
         """
         Installs a Helm chart.
         :param release_name: The name of the Helm release.
         :param chart: The chart name or URL (e.g., stable/nginx-ingress or path to a chart directory).
         :param namespace: The Kubernetes namespace to install the chart in.
-        :param values: A dictionary of custom values for the Helm chart.
+        :param values: Custom values for the Helm chart, in helm --set syntax.
         :return: Output from the Helm install command.
         """
         try:
-            # Add repo and update
-            cmd = [self.helm_executable, "repo",
-                   "add", release_name, chart_url]
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
-            cmd = [self.helm_executable, "repo", "update", release_name]
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
+            await self._ensure_repo(release_name, chart_url)
+            return await self._helm_upgrade_install(
+                release_name, chart_name, namespace, values, remoteValues)
+        except subprocess.CalledProcessError as e:
+            raise _server_error("Helm command failed", e)
+
+    async def _ensure_repo(self, name: str, url: str):
+        """
+        Add a Helm repo and refresh its index, skipping whatever is already known and fresh.
+
+        Each repo has its own lock, so different repos can be refreshed in parallel.
+        """
+        async with self._helm_repo_locks.setdefault(name, asyncio.Lock()):
+            known = self._helm_repos.get(name)
+            if known is None or known[0] != url:
+                cmd = [self.helm_executable, "repo",
+                       "add", "--force-update", name, url]
+                await _run_subprocess(cmd, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.PIPE, text=True)
+                known = (url, None)
+            if known[1] is None or time.monotonic() - known[1] > HELM_REPO_TTL:
+                cmd = [self.helm_executable, "repo", "update", name]
+                await _run_subprocess(cmd, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.PIPE, text=True)
+                known = (url, time.monotonic())
+            self._helm_repos[name] = known
+
+    async def _helm_upgrade_install(self, release_name: str, chart_name: str, namespace: str, values: str = None, remoteValues: str = None):
+        """
+        Run helm upgrade --install for a chart from an already added repo.
+        """
+        values_file = None
+        try:
             # Prepare the Helm command
             cmd = [self.helm_executable, "upgrade", "--install", release_name,
                    f"{release_name}/{chart_name}", "--namespace", namespace, "--create-namespace"]
 
             # Add custom values if provided
             if remoteValues:
-                values = self.get_github_raw_content(remoteValues)
-                cmd.extend(["-f", values])
+                # Helm expects a path for -f, so stage the content in a file
+                with tempfile.NamedTemporaryFile(
+                        "w", suffix=".yaml", delete=False) as values_file:
+                    values_file.write(await asyncio.to_thread(
+                        self.get_github_raw_content, remoteValues))
+                cmd.extend(["-f", values_file.name])
             elif values:
-                for key, value in values.items():
-                    cmd.extend(["--set", f"{key}={value}"])
+                # Helm parses the comma lists, {a,b} arrays and \, escapes itself
+                cmd.extend(["--set", values])
 
             # Run the Helm command
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, check=True)
-            return {"message": result.stdout.strip()}
-        except subprocess.CalledProcessError as e:
-            raise HTTPException(
-                status_code=500, detail=f"Helm command failed: {e.stderr.strip()}")
+            result = await _run_subprocess(
+                cmd, capture_output=True, text=True)
+            return {"message": result.stdout[:HELM_OUTPUT_LIMIT].strip()}
+        finally:
+            if values_file is not None:
+                try:
+                    os.unlink(values_file.name)
+                except OSError:
+                    pass
 
     def check_deployment_exists(self, namespace, name):
         try:
+            APISERVER_CALLS.labels("get", "deployments").inc()
             self.apps_v1.read_namespaced_deployment(name, namespace)
             return True
         except ApiException:
             return False
 
-    def verify_installation(self):
+    async def verify_installation(self):
         """
         Verify the installation of Metrics Server, and KEDA.
+
+        Results are reused for VERIFY_CACHE_TTL seconds to absorb polling.
         """
+        cached = self._fresh_verify_result()
+        if cached is not None:
+            return cached
+
+        # Single-flight: concurrent misses wait for one upstream check
+        async with self._verify_lock:
+            cached = self._fresh_verify_result()
+            if cached is not None:
+                return cached
+
+            now = time.monotonic()
+            metrics_server, keda = await asyncio.gather(
+                asyncio.to_thread(self.check_deployment_exists,
+                                  "kube-system", "metrics-server"),
+                asyncio.to_thread(self.check_deployment_exists,
+                                  "keda", "keda-operator"),
+            )
 
-        return {
-            "metrics_server": self.check_deployment_exists("kube-system", "metrics-server"),
-            "keda": self.check_deployment_exists("keda", "keda-operator"),
-        }
+            result = {
+                "metrics_server": metrics_server,
+                "keda": keda,
+            }
+            self._verify_cache = (now, result)
+            return result
 
-    def deploy_image(self, namespace, image_name, version, port):
+    def _fresh_verify_result(self):
+        timestamp, result = self._verify_cache
+        if result is not None and time.monotonic() - timestamp < VERIFY_CACHE_TTL:
+            return result
+        return None
+
+    async def deploy_image(self, namespace, image_name, version, port, scale_metric=ScaleMetric.BOTH):
         """
         Deploy a container image and set up autoscaling using KEDA.
         """
 
         deployment_name = f"{image_name.replace('/', '-')}-{version}"
 
-        deployment_manifest = {
-            "apiVersion": "apps/v1",
-            "kind": "Deployment",
-            "metadata": {"name": deployment_name, "namespace": namespace},
-            "spec": {
-                "replicas": 1,
-                "selector": {"matchLabels": {"app": deployment_name}},
-                "template": {
-                    "metadata": {"labels": {"app": deployment_name}},
-                    "spec": {
-                        "containers": [
-                            {
-                                "name": deployment_name,
-                                "image": f"{image_name}:{version}",
-                                "ports": [{"containerPort": port}],
-                                "resources": {
-                                    "requests": {"cpu": "100m", "memory": "128Mi"},
-                                    "limits": {"cpu": "500m", "memory": "512Mi"},
-                                },
-                            }
-                        ]
-                    },
-                },
-            },
-        }
-
-        service_manifest = {
-            "apiVersion": "v1",
-            "kind": "Service",
-            "metadata": {"name": deployment_name, "namespace": namespace},
-            "spec": {
-                "selector": {"app": deployment_name},
-                "ports": [{"protocol": "TCP", "port": port, "targetPort": port}],
-                "type": "NodePort",
-            },
-        }
-
-        scaled_object_manifest = {
-            "apiVersion": "keda.sh/v1alpha1",
-            "kind": "ScaledObject",
-            "metadata": {"name": f"{deployment_name}-scaledobject", "namespace": namespace},
-            "spec": {
-                "minReplicaCount": 1,
-                "scaleTargetRef": {
-                    "name": deployment_name,
-                    "kind": "Deployment",
-                },
-                "triggers": [
-                    {
-                        "type": "cpu",
-                        "metricType": "Utilization",
-                        "metadata": {
-                            "value": "80"  # Scale when CPU exceeds 50%
-                        }
-                    },
-                    {
-                        "type": "memory",
-                        "metricType": "Utilization",
-                        "metadata": {
-                            "value": "80"  # Scale when memory exceeds 50%
-                        }
-                    }
-                ]
-            }
-        }
-
-        try:
-            self.apps_v1.create_namespaced_deployment(
-                namespace, deployment_manifest)
-            self.core_v1.create_namespaced_service(namespace, service_manifest)
-            self.custom_api.create_namespaced_custom_object(
+        deployment_manifest = _deployment_manifest(
+            namespace, deployment_name, f"{image_name}:{version}", port)
+        service_manifest = _service_manifest(namespace, deployment_name, port)
+        scaled_object_manifest = _scaled_object_manifest(
+            namespace, deployment_name, scale_metric)
+
+        # The three objects are independent at creation time, so send them together
+        for resource in ("deployments", "services", "scaledobjects"):
+            APISERVER_CALLS.labels("create", resource).inc()
+        outcomes = await asyncio.gather(
+            asyncio.to_thread(self.apps_v1.create_namespaced_deployment,
+                              namespace, deployment_manifest),
+            asyncio.to_thread(self.core_v1.create_namespaced_service,
+                              namespace, service_manifest),
+            asyncio.to_thread(
+                self.custom_api.create_namespaced_custom_object,
                 group="keda.sh",           # KEDA's API group
                 version="v1alpha1",            # KEDA's API version
                 namespace=namespace,           # Namespace where the resource is created
                 # Plural name of the resource (scaledobjects)
                 plural="scaledobjects",
                 body=scaled_object_manifest    # The manifest content to apply
-            )
-        except ApiException as e:
-            raise HTTPException(
-                status_code=500, detail=f"Error creating deployment: {e.body}")
+            ),
+            return_exceptions=True,
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, ApiException):
+                raise _server_error("Error creating deployment", outcome)
+            if isinstance(outcome, Exception):
+                raise outcome
 
-        return {"message": f"Deployment {deployment_name} created successfully."}
+        return {
+            "deployment": deployment_name,
+            "message": f"Deployment {deployment_name} created successfully."
+        }
+
+    async def watch_rollout(self, namespace, name, is_disconnected=None):
+        """
+        Yield status events for a deployment until it is fully rolled out.
 
-    def autoscale_deployment(self, namespace, deployment_name=None):
+        The watch runs in ROLLOUT_WATCH_SLICE second requests, each event read in a
+        worker thread; between slices is_disconnected() is awaited, and the stream
+        ends early once it returns True. Stops after ROLLOUT_TIMEOUT seconds,
+        reporting a timeout event.
+        """
+        deadline = time.monotonic() + ROLLOUT_TIMEOUT
+        resource_version = None
+        while (remaining := deadline - time.monotonic()) > 0:
+            if is_disconnected is not None and await is_disconnected():
+                return
+            w = watch.Watch()
+            APISERVER_CALLS.labels("watch", "deployments").inc()
+            events = w.stream(
+                self.apps_v1.list_namespaced_deployment,
+                namespace,
+                field_selector=f"metadata.name={name}",
+                resource_version=resource_version,
+                timeout_seconds=max(1, int(min(ROLLOUT_WATCH_SLICE, remaining))))
+            try:
+                while (event := await asyncio.to_thread(next, events, None)) is not None:
+                    deploy = event["object"]
+                    resource_version = deploy.metadata.resource_version
+                    status = deploy.status
+                    replicas = deploy.spec.replicas or 0
+                    yield {
+                        "event": event["type"].lower(),
+                        "deployment": name,
+                        "replicas": replicas,
+                        "updated_replicas": status.updated_replicas or 0,
+                        "ready_replicas": status.ready_replicas or 0,
+                        "available_replicas": status.available_replicas or 0,
+                    }
+                    if (status.observed_generation or 0) >= deploy.metadata.generation \
+                            and (status.updated_replicas or 0) >= replicas \
+                            and (status.available_replicas or 0) >= replicas:
+                        yield {"event": "complete", "deployment": name}
+                        return
+            except ApiException as e:
+                yield {"event": "error", "deployment": name, "message": _error_detail(e)}
+                return
+            finally:
+                w.stop()
+                # Still running in a thread if we were cancelled mid-read; the slice
+                # timeout ends it shortly
+                with contextlib.suppress(ValueError):
+                    events.close()
+        yield {"event": "timeout", "deployment": name}
+
+    def autoscale_deployment(self, namespace, deployment_name=None, scale_metric=ScaleMetric.BOTH):
         """
         Autoscale a deployment using KEDA or HPA.
         """
 
-        scaled_object_manifest = {
-            "apiVersion": "keda.sh/v1alpha1",
-            "kind": "ScaledObject",
-            "metadata": {"name": f"{deployment_name}-scaledobject", "namespace": namespace},
-            "spec": {
-                "minReplicaCount": 1,
-                "scaleTargetRef": {
-                    "name": deployment_name,
-                    "kind": "Deployment",
-                },
-                "triggers": [
-                    {
-                        "type": "cpu",
-                        "metricType": "Utilization",
-                        "metadata": {
-                            "value": "80"  # Scale when CPU exceeds 50%
-                        }
-                    },
-                    {
-                        "type": "memory",
-                        "metricType": "Utilization",
-                        "metadata": {
-                            "value": "80"  # Scale when memory exceeds 50%
-                        }
-                    }
-                ]
-            }
-        }
+        scaled_object_manifest = _scaled_object_manifest(
+            namespace, deployment_name, scale_metric)
         try:
+            APISERVER_CALLS.labels("create", "scaledobjects").inc()
             self.custom_api.create_namespaced_custom_object(
                 group="keda.sh",           # KEDA's API group
                 version="v1alpha1",            # KEDA's API version
@@ -317,31 +657,59 @@ class KubernetesCluster:
                 body=scaled_object_manifest    # The manifest content to apply
             )
         except ApiException as e:
-            raise HTTPException(
-                status_code=500, detail=f"Error creating HPA: {e.body}")
+            raise _server_error("Error creating HPA", e)
 
         return {"message": "Autoscaling applied successfully."}
 
-    def get_status(self, namespace, deployment=None):
+    def get_status(self, namespace, deployment=None, limit=100, cont=None, label_selector=None, field_selector=None, output="json"):
         """
-        Get the status of a deployment or all deployments in a namespace.
+        Get the status of a deployment or a page of deployments in a namespace.
+
+        With output="table" the page is rendered as a plain-text table.
         """
 
         if deployment:
+            cached = self.informer.get(
+                namespace, deployment) if self.informer else None
+            if cached is not None:
+                return {"deployment": deployment, **cached}
+            # Not synced yet, or created after the last watch event
+            APISERVER_CALLS.labels("get", "deployments").inc()
             deployment_obj = self.apps_v1.read_namespaced_deployment(
                 deployment, namespace)
             return {
                 "deployment": deployment,
                 "ready_replicas": deployment_obj.status.ready_replicas,
-                "available_replicas": deployment_obj.status.available_replicas
+                "available_replicas": deployment_obj.status.available_replicas,
+                "resource_version": deployment_obj.metadata.resource_version
             }
         else:
-            deployments = self.apps_v1.list_namespaced_deployment(namespace)
-            return [
-                {
-                    "name": deploy.metadata.name,
-                    "ready_replicas": deploy.status.ready_replicas,
-                    "available_replicas": deploy.status.available_replicas
-                }
-                for deploy in deployments.items
-            ]
+            APISERVER_CALLS.labels("list", "deployments").inc()
+            deployments = self.apps_v1.list_namespaced_deployment(
+                namespace,
+                limit=limit,
+                _continue=cont,
+                label_selector=label_selector,
+                field_selector=field_selector)
+            if output == "table":
+                table = io.StringIO()
+                table.write(f"{'NAME':40s} {'READY':>5} {'AVAILABLE':>9}\n")
+                for deploy in deployments.items:
+                    table.write(
+                        f"{deploy.metadata.name:40s} {deploy.status.ready_replicas or 0:>5} "
+                        f"{deploy.status.available_replicas or 0:>9}\n")
+                items = table.getvalue()
+            else:
+                items = [
+                    {
+                        "name": deploy.metadata.name,
+                        "ready_replicas": deploy.status.ready_replicas,
+                        "available_replicas": deploy.status.available_replicas
+                    }
+                    for deploy in deployments.items
+                ]
+            return {
+                "items": items,
+                "continue": deployments.metadata._continue,
+                "resource_version": deployments.metadata.resource_version,
+            }
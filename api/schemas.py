@@ -0,0 +1,50 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+
+
+class ContextsResponse(BaseModel):
+    contexts: List[str]
+
+
+class MessageResponse(BaseModel):
+    message: str
+
+
+class InstallResponse(BaseModel):
+    installed: List[str]
+
+
+class JobResponse(BaseModel):
+    job: str
+    status: str
+    result: Optional[InstallResponse] = None
+    detail: Any = None
+
+
+class VerifyResponse(BaseModel):
+    metrics_server: bool
+    keda: bool
+
+
+class DeploymentStatus(BaseModel):
+    deployment: str
+    ready_replicas: Optional[int] = None
+    available_replicas: Optional[int] = None
+    resource_version: Optional[str] = None
+
+
+class DeploymentStatusList(BaseModel):
+    items: List[DeploymentStatus]
+    resource_version: Optional[str] = None
+
+
+class DeploymentSummary(BaseModel):
+    name: str
+    ready_replicas: Optional[int] = None
+    available_replicas: Optional[int] = None
+
+
+class DeploymentPage(BaseModel):
+    items: List[DeploymentSummary]
+    continue_: Optional[str] = Field(None, alias="continue")
+    resource_version: Optional[str] = None
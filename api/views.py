@@ -1,61 +1,252 @@
-from fastapi import FastAPI, HTTPException, Query, APIRouter
-from fastapi.responses import RedirectResponse
-from controller import KubernetesController
+from fastapi import HTTPException, Query, APIRouter, Request, Response
+from fastapi.responses import ORJSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from controller import KubernetesController, ScaleMetric
+from schemas import (ContextsResponse, DeploymentPage, DeploymentStatus,
+                     DeploymentStatusList, JobResponse, MessageResponse,
+                     VerifyResponse)
+from typing import Annotated, List, Literal, Optional, Union
+import asyncio
+import contextlib
+import functools
+import logging
+import orjson
+import os
+import re
+import tempfile
+import uuid
 
 
-app = APIRouter()
+app = APIRouter(default_response_class=ORJSONResponse)
 controller = KubernetesController()
+logger = logging.getLogger(__name__)
 
+# Bound concurrent subprocess-heavy installs to the number of CPUs.
+_install_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
 
-@app.get("/", include_in_schema=False)
-def docs_redirect():
-    return RedirectResponse(url='/docs')
+# Query parameter declarations, built once and shared by every handler signature.
+_QUERY = Query()
+_LIMIT_QUERY = Query(ge=1)
 
+# In-flight mutating calls keyed by (endpoint, args), shared by identical requests.
+_inflight = {}
 
-@app.get("/connect")
-def connect_to_cluster(context: str = None):
-    try:
-        if context is None:
-            return {"contexts": controller.list_contexts()}
-        controller.connect_cluster(context)
-        return {"message": f"Connected to the {context} cluster successfully."}
-    except HTTPException as e:
-        raise e
 
+async def _coalesce(key, func, *args):
+    """
+    Run func(*args) once for concurrent identical requests; later callers await the first.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(func(*args))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one client disconnecting does not cancel the shared work
+    return await asyncio.shield(task)
 
-@app.get("/install")
-def install_dependencies(
-    metric_server: bool = Query(False), keda: bool = Query(False), remoteValues=Query(None), values=Query(None)
-):
+
+def _etag_matches(request, etag):
+    """
+    Whether the request's If-None-Match already names this ETag.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    return any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
+
+
+async def _install(metric_server, keda, remoteValues, values):
+    async with _install_semaphore:
+        return await controller.install_dependencies(metric_server, keda, remoteValues, values)
+
+
+# Background install job records, one JSON file per job, shared by every worker process.
+JOB_DIR = os.environ.get(
+    "JOB_DIR", os.path.join(tempfile.gettempdir(), "k8s-api-jobs"))
+_MAX_JOBS = 256
+_JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+# Job id of the running install for each argument tuple, so identical requests to this worker share a job
+_running_installs = {}
+# Strong references to running install tasks, which the event loop only holds weakly
+_install_tasks = set()
+
+
+@functools.cache
+def _job_dir():
+    """
+    Create JOB_DIR private to this user, refusing one another user could read or write.
+    """
+    os.makedirs(JOB_DIR, mode=0o700, exist_ok=True)
+    st = os.stat(JOB_DIR)
+    if hasattr(os, "getuid") and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+        raise RuntimeError(
+            f"Job directory {JOB_DIR} must be owned by this user and not accessible to others")
+    return JOB_DIR
+
+
+def _job_path(job_id):
+    return os.path.join(_job_dir(), f"{job_id}.json")
+
+
+def _record_job(job):
+    """
+    Store a job record, dropping the oldest records beyond _MAX_JOBS.
+    """
+    path = _job_path(job["job"])
+    # Write then rename, so other workers never read a partial record
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(orjson.dumps(job))
+    os.replace(f"{path}.tmp", path)
+
+    records = [entry for entry in os.scandir(_job_dir())
+               if entry.name.endswith(".json")]
+    if len(records) > _MAX_JOBS:
+        records.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in records[:-_MAX_JOBS]:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(entry.path)
+
+
+def _load_job(job_id):
+    """
+    Return the stored job record, or None for an unknown job.
+    """
+    if not _JOB_ID_RE.fullmatch(job_id):
+        return None
     try:
-        return controller.install_dependencies(metric_server, keda, remoteValues, values)
-    except HTTPException as e:
-        raise e
+        with open(_job_path(job_id), "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
 
 
-@app.get("/verify")
-def verify_dependencies():
+async def _run_install_job(job_id, args):
     try:
-        return controller.verify_installation()
+        result = await _install(*args)
+        job = {"job": job_id, "status": "succeeded", "result": result}
     except HTTPException as e:
-        raise e
+        job = {"job": job_id, "status": "failed", "detail": e.detail}
+    except Exception as e:
+        logger.exception("Install job %s failed", job_id)
+        job = {"job": job_id, "status": "failed", "detail": str(e)}
+    try:
+        await asyncio.to_thread(_record_job, job)
+    finally:
+        _running_installs.pop(args, None)
+
+
+# A Response is itself an ASGI app, so one prebuilt redirect serves every GET /
+# without going through FastAPI's endpoint pipeline.
+_DOCS_REDIRECT = RedirectResponse(url='/docs')
+app.add_route("/", _DOCS_REDIRECT, methods=["GET"], include_in_schema=False)
+
+
+@app.get("/connect", response_model=Union[ContextsResponse, MessageResponse])
+async def connect_to_cluster(context: Annotated[Optional[str], _QUERY] = None):
+    if context is None:
+        return {"contexts": await controller.list_contexts()}
+    await controller.connect_cluster(context)
+    return {"message": f"Connected to the {context} cluster successfully."}
+
+
+@app.get("/install", status_code=202, response_model=JobResponse)
+async def install_dependencies(
+    metric_server: Annotated[bool, _QUERY] = False,
+    keda: Annotated[bool, _QUERY] = False,
+    remoteValues: Annotated[Optional[str], _QUERY] = None,
+    values: Annotated[Optional[str], _QUERY] = None
+):
+    if values is not None and "=" not in values:
+        raise HTTPException(
+            status_code=422, detail="values must be key=value pairs in helm --set syntax")
+    args = (metric_server, keda, remoteValues, values)
+    job_id = _running_installs.get(args)
+    if job_id is None:
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(_record_job, {"job": job_id, "status": "running"})
+        # Registered only once the record exists, so a failed write leaves nothing behind
+        _running_installs[args] = job_id
+        # A detached task rather than BackgroundTasks, which would run inside this
+        # request and count the whole install towards its latency metric
+        task = asyncio.create_task(_run_install_job(job_id, args))
+        _install_tasks.add(task)
+        task.add_done_callback(_install_tasks.discard)
+    return {"job": job_id, "status": "running"}
+
+
+@app.get("/verify", response_model=VerifyResponse)
+async def verify_dependencies(request: Request, response: Response):
+    result = await controller.verify_installation()
+    etag = f'W/"{int(result["metrics_server"])}{int(result["keda"])}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers.update({"ETag": etag, "Cache-Control": "no-cache"})
+    return result
 
 
 @app.get("/deploy")
-def deploy_application(
-    namespace: str,
-    image_name: str,
-    version: str,
-    port: int
+async def deploy_application(
+    request: Request,
+    namespace: Annotated[str, _QUERY],
+    image_name: Annotated[str, _QUERY],
+    version: Annotated[str, _QUERY],
+    port: Annotated[int, _QUERY],
+    scale_metric: Annotated[ScaleMetric, _QUERY] = ScaleMetric.BOTH
 ):
-    try:
-        return controller.deploy_application(namespace, image_name, version, port)
-    except HTTPException as e:
-        raise e
+    args = (namespace, image_name, version, port, scale_metric)
+    created = await _coalesce(("deploy",) + args, controller.deploy_application, *args)
 
-@app.get("/status")
-def get_status(namespace: str, deployment: str = None):
-    try:
-        return controller.get_deployment_status(namespace, deployment)
-    except HTTPException as e:
-        raise e
+    async def events():
+        yield b"data: " + orjson.dumps({"event": "created", **created}) + b"\n\n"
+        # Watches in short slices and stops once the client has gone away
+        async for event in controller.watch_rollout(
+                namespace, created["deployment"], request.is_disconnected):
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/status", response_model=Union[JobResponse, DeploymentStatus, DeploymentStatusList, DeploymentPage])
+async def get_status(
+    request: Request,
+    response: Response,
+    namespace: Annotated[Optional[str], _QUERY] = None,
+    deployment: Annotated[Optional[List[str]], _QUERY] = None,
+    limit: Annotated[int, _LIMIT_QUERY] = 100,
+    cont: Annotated[Optional[str], _QUERY] = None,
+    label_selector: Annotated[Optional[str], _QUERY] = None,
+    field_selector: Annotated[Optional[str], _QUERY] = None,
+    output: Annotated[Literal["json", "table"], _QUERY] = "json",
+    job: Annotated[Optional[str], _QUERY] = None
+):
+    if job is not None:
+        record = await asyncio.to_thread(_load_job, job)
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job: {job}")
+        return record
+    if namespace is None:
+        raise HTTPException(
+            status_code=422, detail="namespace is required unless job is given")
+
+    # Empty names would mean "list the namespace", so they are dropped along with duplicates
+    deployment = [name for name in dict.fromkeys(deployment or ()) if name]
+    if len(deployment) > 1:
+        # Several names: look them up concurrently
+        status = await controller.get_deployment_statuses(namespace, deployment)
+    else:
+        deployment = deployment[0] if deployment else None
+        status = await controller.get_deployment_status(
+            namespace, deployment, limit, cont, label_selector, field_selector, output)
+    # resourceVersion changes whenever the underlying objects do
+    etag = f'W/"{status["resource_version"]}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if output == "table" and not deployment:
+        if status["continue"]:
+            headers["X-Continue"] = status["continue"]
+        return PlainTextResponse(status["items"], headers=headers)
+    response.headers.update(headers)
+    return status
@@ -2,13 +2,20 @@
 pkgs.mkShellNoCC {
 
   packages = with pkgs; [
-      python312Full
-      python312Packages.flask
-      python312Packages.pip
-      python312Packages.kubernetes
-      python312Packages.fastapi
+      python313Full
+      python313Packages.flask
+      python313Packages.pip
+      python313Packages.kubernetes
+      python313Packages.fastapi
+      python313Packages.orjson
+      python313Packages.pyyaml
+      python313Packages.uvicorn
+      python313Packages.uvloop
+      python313Packages.httptools
+      python313Packages.prometheus-client
+      python313Packages.prometheus-fastapi-instrumentator
       pipreqs
-      python312Packages.autopep8
+      python313Packages.autopep8
   ];
 
 }